@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Single entry point for infrep, pathmv and infrep_applyplans
+Used when running this directory with python3 or the zipapp made by build_zipapp.sh
+
+Either give the command as the first argument i.e. python3 infrep.pyz pathmv file1.txt file2.txt
+Or symlink infrep.pyz to a file named after the command i.e. ln -s infrep.pyz pathmv
+"""
+import os
+import sys
+
+from infrep_func import infrep_applyplans_argparse
+from infrep_func import infrep_argparse
+from infrep_func import pathmv_argparse
+
+commands = {'infrep': infrep_argparse, 'pathmv': pathmv_argparse, 'infrep_applyplans': infrep_applyplans_argparse}
+
+# need to check __name__ since multiprocessing imports this file again in the worker process on some platforms
+if __name__ == "__main__":
+    command = os.path.basename(sys.argv[0])
+    if command not in commands:
+        if len(sys.argv) < 2 or sys.argv[1] not in commands:
+            print('Give one of the following commands as the first argument: ' + ' '.join(commands))
+            sys.exit(1)
+        command = sys.argv[1]
+        # so argparse shows the command as the name of the program
+        sys.argv = [command] + sys.argv[2: ]
+
+    commands[command]()
@@ -0,0 +1,46 @@
+#!/usr/bin/env bash
+
+# stop if any command fails
+set -e
+
+# script to build a single file zipapp containing infrep_func.py and the submodules
+# run setup_submodules.sh first
+# run script as ./build_zipapp.sh outputfile. outputfile is infrep.pyz if not given
+# then run python3 infrep.pyz infrep/pathmv/infrep_applyplans ... or symlink infrep.pyz to infrep, pathmv and infrep_applyplans
+
+# get output file as an absolute path before changing directory
+if [ -n "$1" ]; then
+    if [ ! -d "$(dirname "$1")" ]; then
+        echo "The directory of the output file does not exist: $(dirname "$1")"
+        exit 1
+    fi
+    outputfile="$(cd "$(dirname "$1")" && pwd)/$(basename "$1")"
+else
+    outputfile="$(cd "$(dirname "$0")" && pwd)/infrep.pyz"
+fi
+
+# cd to this script's directory
+cd "$(dirname "$0")"
+
+if [ ! -d submodules/ ]; then
+    echo "submodules/ does not exist. Run setup_submodules.sh first."
+    exit 1
+fi
+
+# copy the files that are needed into a temporary directory
+builddir="$(mktemp -d)"
+cp infrep_func.py __main__.py "$builddir"/
+# -L since submodules may be symlinks
+cp -rL submodules/ "$builddir"/submodules/
+# do not include git history or compiled files
+find "$builddir" -name .git -prune -exec rm -rf {} +
+find "$builddir" -name __pycache__ -prune -exec rm -rf {} +
+
+# include bytecode next to the source since bytecode cannot be written inside a zipapp so it would be compiled each time
+# if the bytecode is for a different python version, the source is used instead
+python3 -m compileall -q -b "$builddir"
+
+# no compression so it is quicker to start
+python3 -m zipapp "$builddir" -o "$outputfile" -p "/usr/bin/env python3"
+
+rm -rf "$builddir"
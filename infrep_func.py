@@ -1,60 +1,641 @@
 #!/usr/bin/env python3
-import argparse
-import difflib
 import os
-from pathlib import Path
 import re
-import shutil
 import sys
 
-__projectdir__ = Path(os.path.dirname(os.path.realpath(__file__)) + '')
+__projectdir__ = os.path.dirname(os.path.realpath(__file__))
+
+# other modules are imported in the functions that use them
+# this means that running infrep with --help or without anything to ask about starts quickly
+# os.path is used rather than pathlib for the same reason
 
 # change color of text when printing
-sys.path.append(str(__projectdir__ / Path('submodules/python-general-func/')))
-from colors_basic import RED
-from colors_basic import BLACK
+sys.path.append(os.path.join(__projectdir__, 'submodules/python-general-func/'))
 
 # y/n single key input using getch
-sys.path.append(str(__projectdir__ / Path('submodules/py-getch/getch/')))
-from getch import getch
+sys.path.append(os.path.join(__projectdir__, 'submodules/py-getch/getch/'))
 
 # argparse fileinputs
-sys.path.append(str(__projectdir__ / Path('submodules/argparse-fileinputs/')))
-from argparse_fileinputs import add_fileinputs
-from argparse_fileinputs import process_fileinputs
+sys.path.append(os.path.join(__projectdir__, 'submodules/argparse-fileinputs/'))
 
 # Definitions:{{{1
 namereplacedtext = 'replacedTEXThere'
+# relative paths that pathmv resolves from the directory of the file they are in i.e. ./file1.txt, ../data/file1.txt, data/file1.txt
+# must contain a / and cannot start after a / or ~ since then it is part of an absolute or home directory path
+# cannot contain a placeholder since then part of it already matched another pattern
+relpathpattern = '(?<![\\w.~/-])(?![\\w./-]*' + namereplacedtext + ')(?:[\\w.-]+/)+(?:[\\w.-]*[\\w-])?'
+# worker process used to match regexes when there is a time limit
+# kept between files since starting a new process for each file is slow
+matchpool = None
 
 
 # Infrep Functions:{{{1
-def infrep_main(tochangedictlist, confirmwhennochanges = True):
+def infrep_getinputpattern(inputterm, inputmethod, filename):
     """
-    Each element is a dictionary.
-    Mandatory elements: inputterm, outputterm, filenames.
-    Optional elements: inputmethod, outputmethod
+    Get the compiled regex that is used to search filename
+    filename should already be converted to a string
+    """
+    if inputmethod == None:
+        # input was basic text
+        inputpattern = re.compile(re.escape(inputterm))
+    if inputmethod == 're':
+        # input method was a regex to input into re.compile
+        inputpattern = re.compile(inputterm)
+    if inputmethod == 'recompiled':
+        # input method was a regex already inputted as re.compile
+        inputpattern = inputterm
+    if inputmethod == 'recompiledfunc':
+        # input method was a function of the filename
+        inputpattern = inputterm(filename)
+
+    return(inputpattern)
+
+
+def infrep_getoutputpattern(match, outputterm, outputmethod, filename):
+    """
+    Get the text that would replace match
+    filename is as inputted so it may be a pathlib.Path
+    outputmethod == 'batchfunc'/'relpath' is handled in infrep_scanfile since it gets all the matches in a file at once
+    """
+    if outputmethod == None:
+        # outputmethod is basic text
+        outputpattern = outputterm
+    if outputmethod == 'eval':
+        # outputmethod is to evaluate the outputterm
+        # so outputterm will be sth like 'match.group(1) + "hello"'
+        # include the names that outputterm could use when this was evaluated inside the loop over matches
+        namespace = {'match': match, 'originalterm': match.group(0), 'startbyte': match.span()[0], 'endbyte': match.span()[1], 'text': match.string, 'filename': filename, 'outputterm': outputterm}
+        exec('outputpattern = ' + outputterm, globals(), namespace)
+        outputpattern = namespace['outputpattern']
+    if outputmethod == 'func':
+        # need to convert to string in case filename is a pathlib.Path
+        outputpattern = outputterm(match, str(filename))
+
+    return(outputpattern)
+
+
+class WorkerMatch():
+    """
+    Used in place of a re.Match for a match found in the worker process since match objects cannot be sent between processes
+    Has the same attributes and methods as re.Match except expand
+    """
+    def __init__(self, pattern, string, regs, lastindex):
+        self.re = pattern
+        self.string = string
+        self.pos = 0
+        self.endpos = len(string)
+        # the span of each group with (-1, -1) if the group did not match
+        self.regs = regs
+        self.lastindex = lastindex
+        self.lastgroup = None
+        for name in pattern.groupindex:
+            if pattern.groupindex[name] == lastindex:
+                self.lastgroup = name
+
+    def getgroup(self, group, default = None):
+        startbyte, endbyte = self.span(group)
+        if startbyte == -1:
+            return(default)
+        return(self.string[startbyte: endbyte])
+
+    def span(self, group = 0):
+        if isinstance(group, str):
+            if group not in self.re.groupindex:
+                raise IndexError('no such group')
+            group = self.re.groupindex[group]
+        if not 0 <= group < len(self.regs):
+            raise IndexError('no such group')
+        return(self.regs[group])
+
+    def start(self, group = 0):
+        return(self.span(group)[0])
+
+    def end(self, group = 0):
+        return(self.span(group)[1])
+
+    def group(self, *groups):
+        if len(groups) == 0:
+            return(self.getgroup(0))
+        if len(groups) == 1:
+            return(self.getgroup(groups[0]))
+        return(tuple([self.getgroup(group) for group in groups]))
+
+    def __getitem__(self, group):
+        return(self.getgroup(group))
+
+    def groups(self, default = None):
+        return(tuple([self.getgroup(group, default) for group in range(1, len(self.regs))]))
+
+    def groupdict(self, default = None):
+        return({name: self.getgroup(name, default) for name in self.re.groupindex})
+
+
+def infrep_findmatchregs(inputpattern, text):
+    """
+    Run in the worker process
+    Returns the spans of the groups and the last group of each match since match objects cannot be sent between processes
+    """
+    return([(match.regs, match.lastindex) for match in inputpattern.finditer(text)])
 
-    inputmethod:
-    inputmethod == None: inputterm is just text that I want to match
-    inputmethod == 're': inputterm is a regex to compile i.e. I run re.compile(inputterm)
-    inputmethod == 'recompiled': inputterm is already a compiled regex i.e. I already ran re.compile(inputterm)
-    inputmethod == 'recompiledfunc': inputterm is a function with argument (filename) which returns an re.compile() argument
 
-    outputmethod:
-    outputmethod == None: outputterm is just text
-    outputmethod == 'eval': outputterm is a string that I evaluate to get the output. Only needed if I want to include matched groups in the output. For example outputterm = 'match.group(1) + "hello"'
-    outputmethod == 'func': outputterm is a function of (match, filename) that returns text
+def infrep_findmatches(inputpattern, text, timeout):
     """
+    Return a list of the matches of inputpattern in text
+    If timeout is not None, the matching is done in a worker process and None is returned if it takes longer than timeout seconds
+    This means a regex with catastrophic backtracking cannot stall the whole run
+    The matches are then WorkerMatch rather than re.Match
+    """
+    global matchpool
+
+    if timeout is None:
+        return(list(inputpattern.finditer(text)))
+
+    import multiprocessing
+
+    if matchpool is None:
+        matchpool = multiprocessing.Pool(1)
+
+    try:
+        matchregs = matchpool.apply_async(infrep_findmatchregs, (inputpattern, text)).get(timeout)
+    except multiprocessing.TimeoutError:
+        # the only way to stop the match is to kill the worker
+        matchpool.terminate()
+        matchpool = None
+        return(None)
+
+    # the text is not sent back since this process already has it
+    return([WorkerMatch(inputpattern, text, regs, lastindex) for regs, lastindex in matchregs])
+
+
+def infrep_closematchpool():
+    """
+    Stop the worker process used by infrep_findmatches if it was started
+    """
+    global matchpool
+
+    if matchpool is not None:
+        matchpool.terminate()
+        matchpool = None
+
+
+def infrep_asktimeout(filename, timeout):
+    """
+    Ask the user what to do when matching filename took longer than timeout
+    Returns a new compiled regex to use for filename or None to skip filename
+    """
+    from colors_basic import RED
+    from colors_basic import BLACK
+    from getch import getch
+
+    print('\nFilename: ' + RED + str(filename) + BLACK + ' took longer than ' + str(timeout) + ' seconds to match.')
+    while True:
+        print("s to skip this file/r to retry this file with a different regex/Q: ")
+        inputted = getch()
+        if inputted == "s":
+            return(None)
+        elif inputted == "r":
+            try:
+                return(re.compile(input('Regex: ')))
+            except re.error as e:
+                print('Invalid regex: ' + str(e))
+        elif inputted == "Q":
+            sys.exit(1)
+        else:
+            print('Input one of the available letters.')
+
+
+def infrep_lintpattern(pattern):
+    """
+    Return a list of warnings about parts of the regex pattern that may cause catastrophic backtracking
+    Currently this warns about nested quantifiers i.e. a repeated group that contains another repeat like (a+)+
+    """
+    # re does not have a public parser
+    try:
+        from re import _parser as sre_parse
+    except ImportError:
+        import sre_parse
+
+    if isinstance(pattern, re.Pattern):
+        pattern = pattern.pattern
+
+    warnings = []
+
+    def checksubpattern(subpattern, insiderepeat):
+        for op, av in subpattern:
+            if str(op) in ['MAX_REPEAT', 'MIN_REPEAT']:
+                repeatmax = av[1]
+                if repeatmax > 1 and insiderepeat is True:
+                    warnings.append('Nested quantifier in regex: ' + str(pattern) + '. A repeated group contains another repeat which can cause catastrophic backtracking.')
+                checksubpattern(av[2], insiderepeat is True or repeatmax > 1)
+            elif str(op) in ['POSSESSIVE_REPEAT', 'ATOMIC_GROUP']:
+                # cannot backtrack into these
+                continue
+            else:
+                # get any subpatterns inside this part of the pattern e.g. groups/branches
+                if not isinstance(av, (tuple, list)):
+                    continue
+                for element in av:
+                    if isinstance(element, sre_parse.SubPattern):
+                        checksubpattern(element, insiderepeat)
+                    elif isinstance(element, list):
+                        for subelement in element:
+                            if isinstance(subelement, sre_parse.SubPattern):
+                                checksubpattern(subelement, insiderepeat)
+
+    checksubpattern(sre_parse.parse(pattern), False)
+
+    # only warn once
+    return(warnings[0: 1])
+
+
+def infrep_originalspans(text, spans, originallist):
+    """
+    text is the text of a file where earlier matches have been replaced by namereplacedtext + str(i) + 'num'
+    originallist[i] is the original term that was replaced by placeholder i
+    spans are the spans of non-overlapping matches in text in the order they appear
+    Return the spans that the matches would have in the file before any placeholders were added
+    """
+    placeholders = [(placeholder.end(), len(originallist[int(placeholder.group(1))]) - len(placeholder.group(0))) for placeholder in re.finditer(namereplacedtext + '([0-9]+)num', text)]
+
+    originalspans = []
+    # placeholders before the start of the current match and before the end of the current match
+    startnumber = 0
+    startchange = 0
+    endnumber = 0
+    endchange = 0
+    for startbyte, endbyte in spans:
+        while startnumber < len(placeholders) and placeholders[startnumber][0] <= startbyte:
+            startchange = startchange + placeholders[startnumber][1]
+            startnumber = startnumber + 1
+        while endnumber < len(placeholders) and placeholders[endnumber][0] <= endbyte:
+            endchange = endchange + placeholders[endnumber][1]
+            endnumber = endnumber + 1
+        originalspans.append((startbyte + startchange, endbyte + endchange))
+
+    return(originalspans)
+
+
+def infrep_mapdecisions(oldtext, newtext, decisions):
+    """
+    Map the decisions made on oldtext onto newtext
+    A decision is only kept if all the lines its match covers are unchanged in newtext
+    Returns a dictionary of (itemnumber, span in newtext, originalterm, outputpattern) -> accepted
+    """
+    import bisect
+    import difflib
+
+    oldlines = oldtext.splitlines(keepends = True)
+    newlines = newtext.splitlines(keepends = True)
+
+    # character position at which each line starts
+    oldlinestarts = [0]
+    for line in oldlines:
+        oldlinestarts.append(oldlinestarts[-1] + len(line))
+    newlinestarts = [0]
+    for line in newlines:
+        newlinestarts.append(newlinestarts[-1] + len(line))
+
+    # blocks of text that are unchanged between oldtext and newtext
+    # each element is (start in oldtext, end in oldtext, start in newtext)
+    equalblocks = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, oldlines, newlines, autojunk = False).get_opcodes():
+        if tag == 'equal':
+            equalblocks.append((oldlinestarts[i1], oldlinestarts[i2], newlinestarts[j1]))
+    equalblockstarts = [block[0] for block in equalblocks]
+
+    mappeddecisions = {}
+    for decision in decisions:
+        startbyte, endbyte = decision['span']
+        blocknumber = bisect.bisect_right(equalblockstarts, startbyte) - 1
+        if blocknumber < 0:
+            continue
+        oldstart, oldend, newstart = equalblocks[blocknumber]
+        # match must lie entirely within the unchanged block
+        # a zero-width match at the end of a block is ambiguous so it is not kept
+        if startbyte >= oldend or endbyte > oldend:
+            continue
+        newspan = (startbyte - oldstart + newstart, endbyte - oldstart + newstart)
+        mappeddecisions[(decision['itemnumber'], newspan, decision['originalterm'], decision['outputpattern'])] = decision['accepted']
+
+    return(mappeddecisions)
+
+
+def infrep_scanfile(filename, itemnumber, filenumber, item, filedata, mappeddecisions = None, asktimeout = True):
+    """
+    Find each match of item in filename and replace it with a placeholder in filedata['text']
+    filedata contains the text and replacements for filename
+    filenumber is the position of filename in the full list of filenames for this item
+
+    Each match where the text would change is added to filedata['decisions'] as a proposal and returned so the user can be asked about it
+    The match is rejected until the user accepts it
+
+    mappeddecisions is only given when rescanning a file that changed between the scan and the write
+    matches in mappeddecisions were already accepted/rejected so the user is not asked about them again
+
+    If matching takes longer than item['timeout'], the file is skipped or, if asktimeout is True, the user can retry it with a different regex
+    """
+    # need to convert to string in case filename is a pathlib.Path
+    filenamestr = str(filename)
+
+    inputpattern = infrep_getinputpattern(item['inputterm'], item['inputmethod'], filenamestr)
+
+    filedata['itemnumbers'].append(itemnumber)
+
+    # find all the matches in one pass over the text
+    text = filedata['text']
+    matches = infrep_findmatches(inputpattern, text, item['timeout'])
+    while matches is None:
+        if asktimeout is False:
+            print('Filename: ' + filenamestr + ' took longer than ' + str(item['timeout']) + ' seconds to match. Skipped.')
+            return([])
+        inputpattern = infrep_asktimeout(filenamestr, item['timeout'])
+        if inputpattern is None:
+            return([])
+        matches = infrep_findmatches(inputpattern, text, item['timeout'])
+    if len(matches) == 0:
+        return([])
+
+    if item['outputmethod'] == 'batchfunc':
+        # get all the replacements for this file in one call
+        outputpatterns = item['outputterm'](matches, filenamestr)
+        if len(outputpatterns) != len(matches):
+            raise ValueError('outputmethod batchfunc returned ' + str(len(outputpatterns)) + ' replacements for ' + str(len(matches)) + ' matches in filename: ' + filenamestr)
+    elif item['outputmethod'] == 'relpath':
+        outputpatterns = pathmv_relpaths(matches, filenamestr, item['outputterm'])
+    else:
+        outputpatterns = [infrep_getoutputpattern(match, item['outputterm'], item['outputmethod'], filename) for match in matches]
+
+    # where the matches would be in the file before placeholders from earlier items were added
+    originalspans = infrep_originalspans(text, [match.span() for match in matches], filedata['originallist'])
+
+    proposals = []
+    # pieces of the new text with the matches replaced by placeholders
+    newtextlist = []
+    # end of the previous match
+    lastendbyte = 0
+    # number of newlines before linecountbyte
+    linenumstart = 0
+    linecountbyte = 0
+
+    for matchnumber in range(len(matches)):
+
+        match = matches[matchnumber]
+        replacementnumber = len(filedata['outputlist'])
+
+        # Getting input and output patterns:{{{
+        originalterm = match.group(0)
+        outputpattern = outputpatterns[matchnumber]
+
+        # getting text position of original term
+        startbyte = match.span()[0]
+        endbyte = match.span()[1]
+        # }}}
+
+        # no point in asking about changes where nothing changes
+        # but still need to do temporary replacement so the placeholder numbers match the positions in outputlist
+        if originalterm != outputpattern:
+
+            # Get details to print:{{{
+
+            # text on the same line as the match
+            linebefore = text[text.rfind('\n', 0, startbyte) + 1: startbyte]
+            lineafterend = text.find('\n', endbyte)
+            if lineafterend == -1:
+                lineafterend = len(text)
+            lineafter = text[endbyte: lineafterend]
+
+            # line numbers:
+            # only count the newlines since the last match
+            linenumstart = linenumstart + text.count('\n', linecountbyte, startbyte)
+            linecountbyte = startbyte
+
+            # End get details to print:}}}
+
+            # record where the match is in the file as read so the decision can be reused if the file changes before it is written
+            proposal = {'itemnumber': itemnumber, 'filenumber': filenumber, 'replacementnumber': replacementnumber, 'span': originalspans[matchnumber], 'originalterm': originalterm, 'outputpattern': outputpattern, 'linebefore': linebefore, 'lineafter': lineafter, 'linenumstart': linenumstart, 'accepted': None}
+
+            decisionkey = (itemnumber, originalspans[matchnumber], originalterm, outputpattern)
+            if mappeddecisions is not None and decisionkey in mappeddecisions:
+                # already decided before the file changed
+                proposal['accepted'] = mappeddecisions[decisionkey]
+            else:
+                proposals.append(proposal)
+
+            filedata['decisions'].append(proposal)
+
+        # Adjusting dicts with replaced text:{{{
+        newtextlist.append(text[lastendbyte: startbyte])
+        newtextlist.append(namereplacedtext + str(replacementnumber) + 'num')
+        lastendbyte = endbyte
+        filedata['originallist'].append(originalterm)
+
+        if originalterm != outputpattern and proposal['accepted'] is True:
+            filedata['outputlist'].append(outputpattern)  # replace match with new term
+        else:
+            filedata['outputlist'].append(originalterm)  # replace match with original term until the user accepts the new term
+        # }}}
+
+    newtextlist.append(text[lastendbyte:])
+    filedata['text'] = ''.join(newtextlist)
+
+    return(proposals)
+
+
+def infrep_reviewproposals(proposals, filedatadict, status):
+    """
+    Ask the user whether to accept each proposal
+    proposals is a list of (filename, proposal) where proposal was returned by infrep_scanfile
+    status contains the answers that apply to more than one match i.e. Y/N/A
+    """
+    import difflib
+
+    from colors_basic import RED
+    from colors_basic import BLACK
+    from getch import getch
+
+    # print the filename in red when it or the item changes so I know I've not used it before
+    lastfile = None
+
+    for filename, proposal in proposals:
+        itemnumber = proposal['itemnumber']
+        originalterm = proposal['originalterm']
+        outputpattern = proposal['outputpattern']
+
+        # automatically accept changes on this file without checking for this pattern if True
+        fileok = status['fileok'].get((itemnumber, filename), False)
+        # automatically reject changes on this file without checking for this pattern if True
+        filenotok = status['filenotok'].get((itemnumber, filename), False)
+
+        # Get details to print:{{{
+
+        # line numbers:
+        linenumstart = proposal['linenumstart']
+        linenumendbef = linenumstart + originalterm.count('\n')
+
+        # match before:
+        curline = proposal['linebefore'] + RED + originalterm + BLACK + proposal['lineafter']
+
+        # match after
+        postline = proposal['linebefore'] + RED + outputpattern + BLACK + proposal['lineafter']
+
+        # End get details to print:}}}
+
+        # Print details:{{{
+
+        print('\n')
+
+        # old method - print separately
+        # print('Full lines before: ' + curline)
+        # print('Full lines after: ' + postline)
+
+        # new method - use difflib which is clearer with large files.
+        # this emphasizes places where the text has changed
+        diff = difflib.ndiff(curline.splitlines(), postline.splitlines())
+        print('\n'.join(diff))
+
+        if linenumstart == linenumendbef:
+            print('Line number: ' + str(linenumstart + 1))
+        else:
+            print('Line numbers: ' + str(linenumstart + 1) + '-' + str(linenumendbef + 1))
+
+        if lastfile != (itemnumber, filename):
+            print('Filename: ' + RED + str(filename) + BLACK)
+            lastfile = (itemnumber, filename)
+        else:
+            print('Filename: ' + str(filename))
+        # End print details}}}
+
+        # Ask user what to do for each match:{{{
+        
+        thisok = False
+        if fileok is False and filenotok is False and status['allok'] is False:
+            inputagain = True
+            while inputagain is True:
+                inputagain = False
+                print("y/Y/n/N/A/Q: ")
+                inputted = getch()
+                if inputted == "y":
+                    thisok = True
+                elif inputted == "n":
+                    thisok = False
+                elif inputted == "Y":
+                    fileok = True
+                    status['fileok'][(itemnumber, filename)] = True
+                elif inputted == "N":
+                    filenotok = True
+                    status['filenotok'][(itemnumber, filename)] = True
+                elif inputted == "A":
+                    status['allok'] = True
+                elif inputted == "Q":
+                    sys.exit(1)
+                else:
+                    inputagain = True
+                    print('Input one of the available letters.')
+
+        if fileok is True or status['allok'] is True:
+            thisok = True
+
+        # }}}
+
+        # Adjusting dicts with replaced text:{{{
+        proposal['accepted'] = thisok
+        if thisok is True:
+            filedatadict[filename]['outputlist'][proposal['replacementnumber']] = outputpattern  # replace match with new term
+            status['changemade'] = True
+        # }}}
+
+
+def infrep_readfile(filename):
+    """
+    Read filename and record what it looked like when it was read so I can check whether it changed before I write to it
+    """
+    with open(filename, 'r', encoding = 'latin-1') as f:
+        # get the stat before reading so a change made after the read gives a different stat
+        filestat = os.fstat(f.fileno())
+        text = f.read()
+
+    filedata = {'text': text, 'outputlist': [], 'originallist': [], 'decisions': [], 'itemnumbers': [], 'originaltext': text, 'stat': [filestat.st_mtime_ns, filestat.st_size]}
+
+    return(filedata)
+
+
+def infrep_rescanfile(filename, items, filedata, status):
+    """
+    Rescan a file that changed after it was scanned
+    Decisions are kept for matches whose text is unchanged and whose lines are unchanged in the new version of the file
+    The user is only asked about matches that are new or have moved
+    """
+    newfiledata = infrep_readfile(filename)
+
+    mappeddecisions = infrep_mapdecisions(filedata['originaltext'], newfiledata['originaltext'], filedata['decisions'])
+
+    proposals = []
+    for itemnumber in filedata['itemnumbers']:
+        # filenumber only matters for ordering proposals across files
+        proposals = proposals + [(filename, proposal) for proposal in infrep_scanfile(filename, itemnumber, 0, items[itemnumber], newfiledata, mappeddecisions = mappeddecisions)]
+
+    infrep_reviewproposals(proposals, {filename: newfiledata}, status)
+
+    return(newfiledata)
+
+
+def infrep_currentfiledata(filename, items, filedata, status):
+    """
+    Return filedata for filename as it is now, rescanning it if it changed since it was scanned
+    Check again after each rescan since the file may change while the user is asked about the new proposals
+    Returns None if the file was deleted
+    """
+    from colors_basic import RED
+    from colors_basic import BLACK
+
+    try:
+        while True:
+            # only compare the text if the modification time or size has changed
+            filestat = os.stat(filename)
+            if [filestat.st_mtime_ns, filestat.st_size] == filedata['stat']:
+                return(filedata)
+            with open(filename, 'r', encoding = 'latin-1') as f:
+                currenttext = f.read()
+            if currenttext == filedata['originaltext']:
+                return(filedata)
+
+            print('\nFilename: ' + RED + str(filename) + BLACK + ' changed since it was scanned. Rescanning.')
+            filedata = infrep_rescanfile(filename, items, filedata, status)
+    except FileNotFoundError:
+        print('\nFilename: ' + RED + str(filename) + BLACK + ' was deleted since it was scanned. Skipped.')
+        return(None)
+
+
+def infrep_haschanges(filedata):
+    """
+    Return True if a match in filedata is replaced with different text or the user was asked about a match in filedata
+    Matches that are replaced with themselves, such as relative paths in pathmv that do not change, are not enough to write the file or save it in a plan
+    """
+    if len(filedata['decisions']) > 0:
+        return(True)
+    for i in range(len(filedata['outputlist'])):
+        if filedata['outputlist'][i] != filedata['originallist'][i]:
+            return(True)
+    return(False)
 
-    # dictionary containing file read from initial file with replacements
-    replacedtextdict = {}
-    # the replacements by filename
-    outputlistdict = {}
-    
-    # this allows me to skip checks for all files - set to False at start
-    allok = False
-    # this allows me to see whether or not any changes have been made - set to False at start
-    changemade = False
+
+def infrep_infileshard(filename, shard):
+    """
+    shard is (i, N) meaning that I am running the ith of N shards where 1 <= i <= N
+    Files are divided between shards using a hash of the path so every process with the same filenames gets the same division
+    """
+    import hashlib
+
+    shardnumber, numshards = shard
+    return(int(hashlib.md5(str(filename).encode('utf-8')).hexdigest(), 16) % numshards == shardnumber - 1)
+
+
+def infrep_parseitems(tochangedictlist, shard = None):
+    """
+    Parse and verify the dictionaries inputted into infrep_main
+    If shard is given, only keep the filenames in that shard
+    """
+    items = []
 
     for item in tochangedictlist:
 
@@ -77,6 +658,13 @@ def infrep_main(tochangedictlist, confirmwhennochanges = True):
             # just use a string
             outputmethod = None
 
+        # this option determines the maximum time to match inputterm in each file - see details in intro to function
+        if 'timeout' in item:
+            timeout = item['timeout']
+        else:
+            # match in this process with no time limit
+            timeout = None
+
         # End parse dict:}}}
 
         # verify filenames exists
@@ -100,162 +688,46 @@ def infrep_main(tochangedictlist, confirmwhennochanges = True):
         if len(notunique) > 0:
             raise ValueError('Duplicates in list of filenames: ' + ' '.join([str(notu) for notu in list(notunique)]))
 
-        # get regex inputpattern
-        if inputmethod == None:
-            # input was basic text
-            inputpattern = re.compile(re.escape(inputterm))
-        if inputmethod == 're':
-            # input method was a regex to input into re.compile
-            inputpattern = re.compile(inputterm)
-        if inputmethod == 'recompiled':
-            # input method was a regex already inputted as re.compile
-            inputpattern = inputterm
-        if inputmethod == 'recompiledfunc':
-            # input method was a function of the filename
-            # since need filename do below
-            None
-
-        for filename in filenames:
-
-            # update regex inputpattern if using filename
-            if inputmethod == 'recompiledfunc':
-                # need to convert the filename to a string in case it's inputted as a pathlib.Path
-                inputpattern = inputterm(str(filename))
-
-            # get text if not already used this file
-            if filename not in replacedtextdict:
-                with open(filename, 'r', encoding = 'latin-1') as f:
-                    replacedtextdict[filename] = f.read()
-                outputlistdict[filename] = []
-
-            # if this is True, print the filename in red so I know I've not used it before
-            firsttimefile = True
-            # automatically accept changes on this file without checking for this pattern if True
-            fileok = False
-            # automatically reject changes on this file without checking for this pattern if True
-            filenotok = False
-
-            while True:
-
-                text = replacedtextdict[filename]
-                outputlist = outputlistdict[filename]
-                replacementnumber = len(outputlist)
-
-                # Getting input and output patterns:{{{
-                match = inputpattern.search(text)
-                if not match:
-                    break
-                originalterm = match.group(0)
-
-                # getting text position of original term
-                startbyte = match.span()[0]
-                endbyte = match.span()[1]
-
-                if outputmethod == None:
-                    # outputmethod is basic text
-                    outputpattern = outputterm
-                if outputmethod == 'eval':
-                    # outputmethod is to evaluate the outputterm
-                    # so outputterm will be sth like 'match.group(1) + "hello"'
-                    namespace = locals()
-                    exec('outputpattern = ' + outputterm, globals(), namespace)
-                    outputpattern = namespace['outputpattern']
-                if outputmethod == 'func':
-                    # need to convert to string in case filename is a pathlib.Path
-                    outputpattern = outputterm(match, str(filename))
-
-                textbefore = text[0:startbyte]
-                textafter = text[endbyte:]
-                # }}}
-
-
-                # no point in asking about changes where nothing changes
-                if originalterm == outputpattern:
-                    # don't make replacement if thisok = 0
-                    # but still need to do temporary replacement to ensure we don't continue to match this pattern so can't just continue on to next pattern
-                    thisok = 0
-
-                else:
-
-                    # Get details to print:{{{
-
-                    textbeforesplit = textbefore.split('\n')
-                    textaftersplit = textafter.split('\n')
+        # keep the position of each filename in the full list so shards can be merged back into the same order
+        filenumbers = list(range(len(filenames)))
+        if shard is not None:
+            filenumbers = [filenumber for filenumber in filenumbers if infrep_infileshard(filenames[filenumber], shard) is True]
 
-                    # line numbers:
-                    linenumstart = len(textbeforesplit) - 1
-                    linenumendbef = linenumstart + len(originalterm.split('\n')) - 1
-                    linenumendaft = linenumstart + len(outputpattern.split('\n')) - 1
+        items.append({'inputterm': inputterm, 'outputterm': outputterm, 'inputmethod': inputmethod, 'outputmethod': outputmethod, 'timeout': timeout, 'filenames': [filenames[filenumber] for filenumber in filenumbers], 'filenumbers': filenumbers})
 
-                    # match before:
-                    curline = textbeforesplit[-1] + RED + originalterm + BLACK + textaftersplit[0]
+    return(items)
 
-                    # match after
-                    postline = textbeforesplit[-1] + RED + outputpattern + BLACK + textaftersplit[0]
 
-                    # End get details to print:}}}
-
-                    # Print details:{{{
-
-                    print('\n')
-
-                    # old method - print separately
-                    # print('Full lines before: ' + curline)
-                    # print('Full lines after: ' + postline)
+def infrep_writefiles(items, filedatadict, status):
+    """
+    Write the accepted replacements to each file
+    If a file changed since it was scanned, rescan it rather than overwriting the changes
+    If a file was deleted since it was scanned, skip it
+    """
+    for filename in filedatadict:
+        if infrep_haschanges(filedatadict[filename]) is False:
+            continue
 
-                    # new method - use difflib which is clearer with large files.
-                    # this emphasizes places where the text has changed
-                    diff = difflib.ndiff(curline.splitlines(), postline.splitlines())
-                    print('\n'.join(diff))
+        # verify the file has not changed since I read it
+        filedata = infrep_currentfiledata(filename, items, filedatadict[filename], status)
+        if filedata is None:
+            continue
+        filedatadict[filename] = filedata
 
-                    if linenumstart == linenumendbef:
-                        print('Line number: ' + str(linenumstart + 1))
-                    else:
-                        print('Line numbers: ' + str(linenumstart + 1) + '-' + str(linenumendbef + 1))
+        text = filedatadict[filename]['text']
+        outputlist = filedatadict[filename]['outputlist']
+        # go from the last placeholder to the first since a later match may contain an earlier placeholder
+        for i in reversed(range(len(outputlist))):
+            text = text.replace(namereplacedtext + str(i) + 'num', outputlist[i])
+        with open(filename, 'wb') as f:
+            f.write(text.encode('latin-1'))
 
-                    if firsttimefile is True:
-                        print('Filename: ' + RED + str(filename) + BLACK)
-                        firsttimefile = False
-                    else:
-                        print('Filename: ' + str(filename))
-                    # End print details}}}
 
-                    # Ask user what to do for each match:{{{
-                    
-                    thisok = False
-                    if fileok is False and filenotok is False and allok is False:
-                        inputagain = True
-                        while inputagain is True:
-                            inputagain = False
-                            print("y/Y/n/N/A/Q: ")
-                            inputted = getch()
-                            if inputted == "y":
-                                thisok = True
-                            elif inputted == "n":
-                                thisok = False
-                            elif inputted == "Y":
-                                fileok = True
-                            elif inputted == "N":
-                                filenotok = True
-                            elif inputted == "A":
-                                allok = True
-                            elif inputted == "Q":
-                                sys.exit(1)
-                            else:
-                                inputagain = True
-                                print('Input one of the available letters.')
-
-                    # }}}
-
-                # Adjusting dicts with replaced text:{{{
-                replacedtextdict[filename] = textbefore + namereplacedtext + str(replacementnumber) + 'num' + textafter
-
-                if fileok is True or allok is True or thisok is True:
-                    outputlistdict[filename].append(outputpattern)  # replace match with new term
-                    changemade = True
-                else:
-                    outputlistdict[filename].append(originalterm)  # replace match with original term
-                # }}}
+def infrep_confirm(changemade, confirmwhennochanges):
+    """
+    Ask the user whether to write the accepted replacements
+    """
+    from getch import getch
 
     if changemade is True or confirmwhennochanges is True:
         inputagain = True
@@ -270,14 +742,190 @@ def infrep_main(tochangedictlist, confirmwhennochanges = True):
                 inputagain = True
                 print('Input one of the available letters.')
 
-    for filename in replacedtextdict:
-        if len(outputlistdict[filename]) == 0:
-            continue
-        text = replacedtextdict[filename]
-        for i in range(len(outputlistdict[filename])):
-            text = text.replace(namereplacedtext + str(i) + 'num', outputlistdict[filename][i])
-        with open(filename, 'wb') as f:
-            f.write(text.encode('latin-1'))
+
+def infrep_main(tochangedictlist, confirmwhennochanges = True, shard = None):
+    """
+    Each element is a dictionary.
+    Mandatory elements: inputterm, outputterm, filenames.
+    Optional elements: inputmethod, outputmethod, timeout
+
+    inputmethod:
+    inputmethod == None: inputterm is just text that I want to match
+    inputmethod == 're': inputterm is a regex to compile i.e. I run re.compile(inputterm)
+    inputmethod == 'recompiled': inputterm is already a compiled regex i.e. I already ran re.compile(inputterm)
+    inputmethod == 'recompiledfunc': inputterm is a function with argument (filename) which returns an re.compile() argument
+
+    outputmethod:
+    outputmethod == None: outputterm is just text
+    outputmethod == 'eval': outputterm is a string that I evaluate to get the output. Only needed if I want to include matched groups in the output. For example outputterm = 'match.group(1) + "hello"'
+    outputmethod == 'func': outputterm is a function of (match, filename) that returns text
+    outputmethod == 'batchfunc': outputterm is a function of (matches, filename) that returns a list of text with one element for each element of matches. matches is a list of all the matches of inputterm in filename. This is faster than 'func' when there is setup that only needs to be done once per file.
+    outputmethod == 'relpath': outputterm is a dictionary of full paths of moved files -> full paths they are moved to. Each match is a relative path which is resolved from the directory of the file it is in and replaced with the relative path to where it is moved. Used by pathmv.
+
+    timeout:
+    timeout == None: match inputterm in this process with no time limit
+    timeout is a number: match inputterm in each file in a worker process. If this takes longer than timeout seconds, the user can skip the file or retry it with a different regex. Use this if inputterm is a regex that may backtrack catastrophically. Since match objects cannot be sent between processes, outputterm gets a WorkerMatch which has the same methods as a match object except expand.
+
+    If a file is changed by another program between when it is scanned and when it is written, it is rescanned rather than overwritten.
+
+    shard = (i, N) means only run on the filenames in the ith of N shards. See infrep_infileshard.
+    """
+
+    # dictionary containing file read from initial file with replacements and the replacements by filename
+    filedatadict = {}
+    
+    # allok allows me to skip checks for all files - set to False at start
+    # changemade allows me to see whether or not any changes have been made - set to False at start
+    # fileok/filenotok record which (item, file) I accepted/rejected all changes for
+    status = {'allok': False, 'changemade': False, 'fileok': {}, 'filenotok': {}}
+
+    items = infrep_parseitems(tochangedictlist, shard = shard)
+
+    # stop the worker process used for timeouts however the run ends
+    try:
+        for itemnumber in range(len(items)):
+
+            for filename, filenumber in zip(items[itemnumber]['filenames'], items[itemnumber]['filenumbers']):
+
+                # get text if not already used this file
+                if filename not in filedatadict:
+                    filedatadict[filename] = infrep_readfile(filename)
+
+                proposals = infrep_scanfile(filename, itemnumber, filenumber, items[itemnumber], filedatadict[filename])
+                infrep_reviewproposals([(filename, proposal) for proposal in proposals], filedatadict, status)
+
+        infrep_confirm(status['changemade'], confirmwhennochanges)
+
+        infrep_writefiles(items, filedatadict, status)
+    finally:
+        infrep_closematchpool()
+
+
+# Infrep Plans:{{{1
+def infrep_getplan(tochangedictlist, shard = None):
+    """
+    Scan the files in tochangedictlist without asking the user about any matches
+    Returns a plan that can be saved with infrep_saveplan and reviewed and applied later with infrep_applyplans
+    Plans from different shards of the same tochangedictlist can be merged by infrep_applyplans
+    The shard is saved in the plan so infrep_applyplans can check that it has a plan for every shard
+
+    Since the plan is saved as json, inputmethod must be None or 're' and outputmethod must be None, 'eval' or 'relpath'
+    """
+    items = infrep_parseitems(tochangedictlist, shard = shard)
+
+    for item in items:
+        if item['inputmethod'] not in [None, 're'] or item['outputmethod'] not in [None, 'eval', 'relpath']:
+            raise ValueError('Plans can only be made when inputmethod is None or re and outputmethod is None, eval or relpath.')
+
+    filedatadict = {}
+    # stop the worker process used for timeouts however the scan ends
+    try:
+        for itemnumber in range(len(items)):
+            for filename, filenumber in zip(items[itemnumber]['filenames'], items[itemnumber]['filenumbers']):
+                # need to convert to string in case filename is a pathlib.Path
+                filename = str(filename)
+                if filename not in filedatadict:
+                    filedatadict[filename] = infrep_readfile(filename)
+                infrep_scanfile(filename, itemnumber, filenumber, items[itemnumber], filedatadict[filename], asktimeout = False)
+    finally:
+        infrep_closematchpool()
+
+    # only files with matches that change need to be in the plan
+    filedatadict = {filename: filedatadict[filename] for filename in filedatadict if infrep_haschanges(filedatadict[filename]) is True}
+
+    plan = {'items': [{'inputterm': item['inputterm'], 'outputterm': item['outputterm'], 'inputmethod': item['inputmethod'], 'outputmethod': item['outputmethod'], 'timeout': item['timeout']} for item in items], 'files': filedatadict, 'moves': [], 'shard': shard}
+
+    return(plan)
+
+
+def infrep_saveplan(plan, planfile):
+    import json
+
+    with open(planfile, 'w') as f:
+        json.dump(plan, f)
+
+
+def infrep_applyplans(planfiles, confirmwhennochanges = True):
+    """
+    Merge the plans saved in planfiles, ask the user about each proposal in the same order as infrep_main would, write the accepted replacements and then do any moves saved in the plans
+    The plans should come from different shards of the same run so they have the same items and moves and different files
+    Either there is a single plan made without a shard or there is exactly one plan for each of the N shards
+    Nothing is written or moved otherwise since the references in a missing shard would not be updated
+    """
+    import json
+    import shutil
+
+    plans = []
+    for planfile in planfiles:
+        with open(planfile) as f:
+            plans.append(json.load(f))
+
+    # Merge plans:{{{
+    items = plans[0]['items']
+    moves = plans[0]['moves']
+    filedatadict = {}
+    for i in range(len(plans)):
+        if plans[i]['items'] != items:
+            raise ValueError('Plan ' + str(planfiles[i]) + ' has different items to plan ' + str(planfiles[0]) + '.')
+        if plans[i]['moves'] != moves:
+            raise ValueError('Plan ' + str(planfiles[i]) + ' has different moves to plan ' + str(planfiles[0]) + '.')
+        for filename in plans[i]['files']:
+            if filename in filedatadict:
+                raise ValueError('Filename ' + filename + ' is in more than one plan.')
+            filedatadict[filename] = plans[i]['files'][filename]
+            for decision in filedatadict[filename]['decisions']:
+                # json converts tuples to lists
+                decision['span'] = tuple(decision['span'])
+
+    # verify the plans cover every file
+    shards = [plan['shard'] for plan in plans]
+    if None in shards:
+        if len(plans) != 1:
+            raise ValueError('A plan made without --shard cannot be merged with other plans.')
+    else:
+        numshards = shards[0][1]
+        if sorted(shards) != [[shardnumber, numshards] for shardnumber in range(1, numshards + 1)]:
+            raise ValueError('Plans should cover each of shards 1/' + str(numshards) + ' to ' + str(numshards) + '/' + str(numshards) + ' exactly once. Shards: ' + ', '.join([str(shard[0]) + '/' + str(shard[1]) for shard in shards]) + '.')
+    # }}}
+
+    # review in the order of items then the position of the file in the full list then the position of the match in the file
+    proposals = [(filename, decision) for filename in filedatadict for decision in filedatadict[filename]['decisions'] if decision['accepted'] is None]
+    proposals.sort(key = lambda proposal: (proposal[1]['itemnumber'], proposal[1]['filenumber'], proposal[1]['replacementnumber']))
+
+    status = {'allok': False, 'changemade': False, 'fileok': {}, 'filenotok': {}}
+
+    # stop the worker process used for timeouts if a file is rescanned however the run ends
+    try:
+        infrep_reviewproposals(proposals, filedatadict, status)
+
+        infrep_confirm(status['changemade'], confirmwhennochanges)
+
+        infrep_writefiles(items, filedatadict, status)
+    finally:
+        infrep_closematchpool()
+
+    for inputfile, outputfile in moves:
+        shutil.move(inputfile, outputfile)
+
+
+def infrep_applyplans_argparse():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('planfiles', nargs = '+', help = 'Plans saved by infrep or pathmv with --saveplan. Usually one for each shard.')
+    args = parser.parse_args()
+
+    infrep_applyplans(args.planfiles)
+
+
+def infrep_parseshard(shardstring):
+    """
+    Convert '--shard i/N' into (i, N)
+    """
+    match = re.fullmatch('([0-9]+)/([0-9]+)', shardstring)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise ValueError('--shard should be i/N where 1 <= i <= N. --shard: ' + shardstring)
+    return((int(match.group(1)), int(match.group(2))))
 
 
 def infrep_argparse(filelist = None):
@@ -290,12 +938,18 @@ def infrep_argparse(filelist = None):
     5 options - see below
 
     Can specify inputmethod/outputmethod:
-    Note I can't use inputmethod== 'recompiled'/'recompiledfunc' or outputmethod=='func' since I need python to use them
+    Note I can't use inputmethod== 'recompiled'/'recompiledfunc' or outputmethod=='func'/'batchfunc' since I need python to use them
     So I can only specify 'reinput' to get inputmethod == 're' and/or 'reoutput' to get outputmethod == 'eval'
     '--reboth' gives '--reinput --reoutput'
 
     Can specify that inputterm and outputterm are filenames and the files contain the actual inputterm/outputterm
+
+    Can split a large run between processes using --shard i/N --saveplan planfile in each process and then run/infrep_applyplans.py on the planfiles
     """
+    import argparse
+
+    from argparse_fileinputs import add_fileinputs
+    from argparse_fileinputs import process_fileinputs
 
     # Get argparse:{{{
 
@@ -311,12 +965,17 @@ def infrep_argparse(filelist = None):
     parser.add_argument('--reinput', help = "inputterm that is inputted into re.compile (inputmethod = 're'). I need two backslashes if I want to write backslash, since when I input in the regex \\\\ -> \\", action = 'store_true')
     parser.add_argument('--reoutput', help = "outputterm is text that is executed. Allows me to input matches. Something like 'match.group(1) + \"hello\". (outputmethod = 'eval'). I need two backslashes if I want to write a backslash, since eval('\\\\') = '\\'", action = 'store_true')
     parser.add_argument("-r", "--reboth", action='store_true', help="Equivalent to setting --reinput --reoutput.")
+    parser.add_argument("--timeout", type=float, help="Match inputterm in each file in a worker process and stop if it takes longer than this many seconds. Then I can skip the file or retry it with a different regex. Useful with --reinput if the regex may backtrack catastrophically.")
     
     # if want to put inputterm/outputterm in a file rather than on command line:
     parser.add_argument("--fileboth", action='store_true', help="Both inputterm and outputterm are filenames which should be read to get the actual inputterm and outputterm. Equivalent to setting --fileinput --fileoutput.")
     parser.add_argument("--fileinput", action='store_true', help="inputterm is actually a filename which should be read to get the actual inputterm. If a newline is the last character, ignore this.")
     parser.add_argument("--fileoutput", action='store_true', help="outputterm is actually a filename which should be read to get the actual outputterm. If a newline is the last character, ignore this.")
 
+    # split the run between processes:
+    parser.add_argument("--shard", type=str, help="i/N. Only run on the files in the ith of N shards. Files are divided between shards by a hash of their path.")
+    parser.add_argument("--saveplan", type=str, help="Do not ask about or make any replacements. Instead, save the proposed replacements to this file. Review and apply the plans from each shard with run/infrep_applyplans.py.")
+
     args = parser.parse_args()
 
     # End get argparse:}}}
@@ -353,11 +1012,38 @@ def infrep_argparse(filelist = None):
             outputterm = outputterm[: -1]
         args.outputterm = outputterm
 
+    # warn before the scan starts if the regex may take a very long time to match
+    if inputmethod == 're':
+        for warning in infrep_lintpattern(args.inputterm):
+            print('Warning: ' + warning)
+            if args.timeout is None:
+                print('Consider setting --timeout.')
+
+    if args.shard is not None:
+        shard = infrep_parseshard(args.shard)
+    else:
+        shard = None
+
     # Call infrep:
-    infrep_main([{'filenames': filelist, 'inputterm': args.inputterm, 'outputterm': args.outputterm, 'inputmethod': inputmethod, 'outputmethod': outputmethod}])
+    tochangedictlist = [{'filenames': filelist, 'inputterm': args.inputterm, 'outputterm': args.outputterm, 'inputmethod': inputmethod, 'outputmethod': outputmethod, 'timeout': args.timeout}]
+    if args.saveplan is not None:
+        infrep_saveplan(infrep_getplan(tochangedictlist, shard = shard), args.saveplan)
+    else:
+        infrep_main(tochangedictlist, shard = shard)
 
 
 # Pathmv:{{{1
+def getfullpath(path):
+    """
+    Return the absolute path of path without / at the end or ../
+    """
+    if os.path.isabs(path) is True:
+        return(os.path.abspath(path))
+    else:
+        # if relative, do abspath of os.getenv('PWD') because this ensures that I maintain symlinks in the path
+        return(os.path.abspath(os.path.join(os.getenv('PWD'), path)))
+
+
 def getabspath(files):
     """
     Example:
@@ -375,11 +1061,7 @@ def getabspath(files):
 
     # Standardize files using abspath to remove / from end of directories and remove ../
     for i in range(len(files)):
-        if os.path.isabs(files[i]) is True:
-            files[i] = os.path.abspath(files[i])
-        else:
-            # if relative, do abspath of os.getenv('PWD') because this ensures that I maintain symlinks in the path
-            files[i] = os.path.abspath(os.path.join(os.getenv('PWD'), files[i]))
+        files[i] = getfullpath(files[i])
         
     # Defining input and output files:
     fullinputpaths = files[0:len(files) - 1]
@@ -415,11 +1097,19 @@ def getabspath(files):
     return(fullinputpaths, fulloutputpaths)
 
 
-def pathmv_main(filestomove, filestoparse):
+def pathmv_main(filestomove, filestoparse, shard = None, saveplan = None):
     """
     Function to check for any references to files that are being moved in filestoparse and replace those references
     If error during the text replacement part then do not actually move the files
+
+    If saveplan is given, do not replace anything or move the files. Instead, save the proposed replacements and the moves to saveplan so they can be done later by infrep_applyplans
+    shard = (i, N) means only check the filestoparse in the ith of N shards. It can only be used with saveplan since the files should only be moved once every shard is done.
     """
+    import shutil
+
+    if shard is not None and saveplan is None:
+        print('pathmv can only be run on a shard when saving a plan.')
+        sys.exit(1)
 
     fullinputpaths, fulloutputpaths = getabspath(filestomove)
 
@@ -444,8 +1134,19 @@ def pathmv_main(filestomove, filestoparse):
 
         if tildereplace is True:
             infreplist.append({'inputterm': tildeinput, 'outputterm': tildeoutput, 'filenames': filestoparse})
+
+    # also replace paths relative to the directory of the file they are in
+    # so if moving /home/user1/dir1/1.txt to /home/user1/dir2/1.txt then replace ../dir1/1.txt with ../dir2/1.txt in /home/user1/dir3/3.txt
+    # this is done for all the moved files in one pass over each file
+    infreplist.append({'inputterm': relpathpattern, 'outputterm': dict(zip(fullinputpaths, fulloutputpaths)), 'inputmethod': 're', 'outputmethod': 'relpath', 'filenames': filestoparse})
                 
 
+    if saveplan is not None:
+        plan = infrep_getplan(infreplist, shard = shard)
+        plan['moves'] = [[inputfile, filestomove[-1]] for inputfile in filestomove[: -1]]
+        infrep_saveplan(plan, saveplan)
+        return(None)
+
     # do the file text replacement
     infrep_main(infreplist)
 
@@ -454,7 +1155,57 @@ def pathmv_main(filestomove, filestoparse):
         shutil.move(inputfile, filestomove[-1])
         
 
+def pathmv_newpath(path, moves):
+    """
+    Return where path will be after moves
+    moves is a dictionary of full input path -> full output path
+    If a directory containing path is moved then path moves with it
+    """
+    parentpath = path
+    while True:
+        if parentpath in moves:
+            return(moves[parentpath] + path[len(parentpath): ])
+        newparentpath = os.path.dirname(parentpath)
+        if newparentpath == parentpath:
+            return(path)
+        parentpath = newparentpath
+
+
+def pathmv_relpaths(matches, filename, moves):
+    """
+    Return the replacement for each relative path in matches
+    Each path is resolved from the directory of filename and looked up in moves which is a dictionary of full input path -> full output path
+    If filename is itself being moved, paths to files that exist are also changed so they are relative to the new directory of filename
+    """
+    olddir = os.path.dirname(getfullpath(filename))
+    newdir = os.path.dirname(pathmv_newpath(getfullpath(filename), moves))
+
+    outputpatterns = []
+    for match in matches:
+        relpath = match.group(0)
+
+        oldpath = os.path.normpath(os.path.join(olddir, relpath))
+        newpath = pathmv_newpath(oldpath, moves)
+        if newpath == oldpath and (newdir == olddir or not os.path.exists(oldpath)):
+            outputpatterns.append(relpath)
+            continue
+
+        # keep the same form as the original relative path
+        newrelpath = os.path.relpath(newpath, newdir)
+        if relpath.startswith('./') and not newrelpath.startswith('../'):
+            newrelpath = './' + newrelpath
+        if relpath.endswith('/'):
+            newrelpath = newrelpath + '/'
+        outputpatterns.append(newrelpath)
+
+    return(outputpatterns)
+
+
 def pathmv_argparse(filelist = None):
+    import argparse
+
+    from argparse_fileinputs import add_fileinputs
+    from argparse_fileinputs import process_fileinputs
 
     parser = argparse.ArgumentParser()
 
@@ -463,6 +1214,10 @@ def pathmv_argparse(filelist = None):
 
     parser = add_fileinputs(parser)
 
+    # split the run between processes:
+    parser.add_argument("--shard", type=str, help="i/N. Only check the files in the ith of N shards. Files are divided between shards by a hash of their path. Needs --saveplan.")
+    parser.add_argument("--saveplan", type=str, help="Do not ask about or make any replacements or move any files. Instead, save the proposed replacements and moves to this file. Review and apply the plans from each shard with run/infrep_applyplans.py.")
+
     args = parser.parse_args()
 
 
@@ -470,6 +1225,11 @@ def pathmv_argparse(filelist = None):
     if filelist is None:
         filelist = process_fileinputs(args)
 
-    pathmv_main(args.files, filelist)
+    if args.shard is not None:
+        shard = infrep_parseshard(args.shard)
+    else:
+        shard = None
+
+    pathmv_main(args.files, filelist, shard = shard, saveplan = args.saveplan)
 
     
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+__projectdir__ = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+
+sys.path.append(__projectdir__)
+from infrep_func import infrep_applyplans_argparse
+
+# need to check __name__ since multiprocessing imports this file again in the worker process on some platforms
+if __name__ == "__main__":
+    infrep_applyplans_argparse()
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import os
-from pathlib import Path
 import sys
 
-__projectdir__ = Path(os.path.dirname(os.path.realpath(__file__)) + '/..')
+__projectdir__ = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
 
-sys.path.append(str(__projectdir__ / Path('.')))
+sys.path.append(__projectdir__)
 from infrep_func import pathmv_argparse
 
-pathmv_argparse()
+# need to check __name__ since multiprocessing imports this file again in the worker process on some platforms
+if __name__ == "__main__":
+    pathmv_argparse()
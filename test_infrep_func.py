@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 
+import json
 import os
 from pathlib import Path
 import re
 import shutil
 import subprocess
 import sys
+import time
 
 __projectdir__ = Path(os.path.dirname(os.path.realpath(__file__)) + '/')
 
+from infrep_func import infrep_closematchpool
+from infrep_func import infrep_findmatches
+from infrep_func import infrep_lintpattern
 from infrep_func import infrep_main
 from infrep_func import pathmv_main
 
@@ -55,6 +60,22 @@ def testinfrep_inputmethod_re_outputmethod_eval():
         raise ValueError('No match')
         
 
+def testinfrep_outputmethod_eval_originalterm():
+    """
+    Verify that outputterm can use originalterm and filename as well as match
+    """
+    testinfrep_setup()
+
+    # do replace
+    infrep_main([{'inputterm': '\\1cat.', 'outputterm': 'originalterm.upper() + filename.name', 'filenames': [__projectdir__ / Path('testinfrep/test_simple.txt')], 'outputmethod': 'eval'}])
+
+    # verify worked
+    with open(__projectdir__ / Path('testinfrep/test_simple.txt')) as f:
+        text = f.read()
+    if text != '1\n\\1CAT.test_simple.txt\n2\n':
+        raise ValueError('No match')
+
+
 def testinfrep_inputmethod_recompiled():
     testinfrep_setup()
 
@@ -89,6 +110,179 @@ def testinfrep_inputmethod_recompiledfunc_outputmethod_func():
         raise ValueError('No match')
 
 
+def testinfrep_outputmethod_batchfunc():
+    testinfrep_setup()
+
+    # define function
+    def outputfunc(matches, filename):
+        basename = str(os.path.basename(filename))
+        return([basename + '!' + match.group(2) for match in matches])
+
+    # do replace
+    infrep_main([{'inputterm': '(test_funcboth[0-9]*\\.txt):([0-9]*)', 'outputterm': outputfunc, 'filenames': [__projectdir__ / Path('testinfrep/test_funcboth.txt')], 'inputmethod': 're', 'outputmethod': 'batchfunc'}])
+
+    # verify worked
+    with open(__projectdir__ / Path('testinfrep/test_funcboth.txt')) as f:
+        text = f.read()
+    if text != 'test_funcboth.txt!123\ntest_funcboth.txt!124\n':
+        raise ValueError('No match')
+
+
+def testinfrep_filechanged():
+    """
+    Verify that a file changed by another program between the scan and the write is rescanned rather than overwritten
+    Accept cat1, reject cat2 and then accept cat0 when it is found on the rescan
+    """
+    testinfrep_setup()
+
+    with open(__projectdir__ / Path('testinfrep/test_changed.txt'), 'w+') as f:
+        f.write('cat1\ncat2\n')
+
+    # change the file while it is being scanned
+    changed = []
+    def outputfunc(match, filename):
+        if len(changed) == 0:
+            with open(filename, 'w') as f:
+                f.write('cat0\ncat1\ncat2\n')
+            changed.append(True)
+        return('dog' + match.group(1))
+
+    # do replace
+    infrep_main([{'inputterm': re.compile('cat([0-9])'), 'outputterm': outputfunc, 'filenames': [__projectdir__ / Path('testinfrep/test_changed.txt')], 'inputmethod': 'recompiled', 'outputmethod': 'func'}])
+
+    # verify worked
+    with open(__projectdir__ / Path('testinfrep/test_changed.txt')) as f:
+        text = f.read()
+    if text != 'dog0\ndog1\ncat2\n':
+        raise ValueError('No match')
+
+
+def testinfrep_filechangedtwice():
+    """
+    Verify that a file changed again while the user is asked about the rescan is rescanned again
+    Accept cat1, reject cat2, proceed, accept cat0 on the first rescan and then accept cat3 on the second rescan
+    """
+    testinfrep_setup()
+
+    with open(__projectdir__ / Path('testinfrep/test_changedtwice.txt'), 'w+') as f:
+        f.write('cat1\ncat2\n')
+
+    # change the file while it is being scanned and again while it is being rescanned
+    calls = []
+    def outputfunc(match, filename):
+        calls.append(True)
+        if len(calls) == 1:
+            with open(filename, 'w') as f:
+                f.write('cat0\ncat1\ncat2\n')
+        if len(calls) == 3:
+            with open(filename, 'w') as f:
+                f.write('cat0\ncat1\ncat2\ncat3\n')
+        return('dog' + match.group(1))
+
+    # do replace
+    infrep_main([{'inputterm': re.compile('cat([0-9])'), 'outputterm': outputfunc, 'filenames': [__projectdir__ / Path('testinfrep/test_changedtwice.txt')], 'inputmethod': 'recompiled', 'outputmethod': 'func'}])
+
+    # verify worked
+    with open(__projectdir__ / Path('testinfrep/test_changedtwice.txt')) as f:
+        text = f.read()
+    if text != 'dog0\ndog1\ncat2\ndog3\n':
+        raise ValueError('No match')
+
+
+def testinfrep_filedeleted():
+    """
+    Verify that a file deleted between the scan and the write is skipped and the other files are still written
+    Accept both changes
+    """
+    testinfrep_setup()
+
+    shutil.copy(__projectdir__ / Path('testinfrep/test_simple.txt'), __projectdir__ / Path('testinfrep/test_simple2.txt'))
+
+    # delete the first file while it is being scanned
+    def outputfunc(match, filename):
+        if filename.endswith('test_simple.txt'):
+            os.remove(filename)
+        return('\\1dog.')
+
+    # do replace
+    infrep_main([{'inputterm': '\\1cat.', 'outputterm': outputfunc, 'filenames': [__projectdir__ / Path('testinfrep/test_simple.txt'), __projectdir__ / Path('testinfrep/test_simple2.txt')], 'outputmethod': 'func'}])
+
+    # verify worked
+    if os.path.isfile(__projectdir__ / Path('testinfrep/test_simple.txt')):
+        raise ValueError('Deleted file was written')
+    with open(__projectdir__ / Path('testinfrep/test_simple2.txt')) as f:
+        text = f.read()
+    if text != '1\n\\1dog.\n2\n':
+        raise ValueError('No match')
+
+
+def testinfrep_timeout():
+    """
+    Verify that a regex with catastrophic backtracking is stopped after the timeout
+    Press s to skip the file when asked
+    """
+    testinfrep_setup()
+
+    with open(__projectdir__ / Path('testinfrep/test_timeout.txt'), 'w+') as f:
+        f.write('a' * 40 + '\n')
+
+    # do replace
+    infrep_main([{'inputterm': '(a+)+b', 'outputterm': 'c', 'filenames': [__projectdir__ / Path('testinfrep/test_timeout.txt')], 'inputmethod': 're', 'timeout': 1}])
+
+    # verify nothing changed
+    with open(__projectdir__ / Path('testinfrep/test_timeout.txt')) as f:
+        text = f.read()
+    if text != 'a' * 40 + '\n':
+        raise ValueError('File changed')
+
+
+def testinfrep_timeout_emptymatch():
+    """
+    Verify that matches are still found correctly when there is a timeout and the regex has empty matches
+    Press y to accept both changes
+    """
+    testinfrep_setup()
+
+    with open(__projectdir__ / Path('testinfrep/test_timeout_emptymatch.txt'), 'w+') as f:
+        f.write('abc\n')
+
+    # do replace
+    infrep_main([{'inputterm': '(?=a)|ab(?=c)', 'outputterm': 'X', 'filenames': [__projectdir__ / Path('testinfrep/test_timeout_emptymatch.txt')], 'inputmethod': 're', 'timeout': 5}])
+
+    # verify both the empty match and the match at the same position were replaced like re.sub does
+    with open(__projectdir__ / Path('testinfrep/test_timeout_emptymatch.txt')) as f:
+        text = f.read()
+    if text != 'XXc\n':
+        raise ValueError('Replace failed')
+
+
+def testinfrep_workermatch():
+    """
+    Verify that the matches found in the worker process when there is a timeout give the same results as re.Match
+    """
+    for pattern, text in [('(?P<a>x)(y)?|(z)', 'xzxy'), ('(?=a)|ab(?=c)', 'abc')]:
+        inputpattern = re.compile(pattern)
+        matches = infrep_findmatches(inputpattern, text, 5)
+        rematches = list(inputpattern.finditer(text))
+        if len(matches) != len(rematches):
+            raise ValueError('Different number of matches')
+        for match, rematch in zip(matches, rematches):
+            if [match.span(i) for i in range(len(rematch.regs))] != [rematch.span(i) for i in range(len(rematch.regs))]:
+                raise ValueError('Different spans')
+            if match.group() != rematch.group() or match.groups() != rematch.groups() or match.groupdict('') != rematch.groupdict('') or match.lastgroup != rematch.lastgroup:
+                raise ValueError('Different groups')
+    infrep_closematchpool()
+
+
+def testinfrep_lintpattern():
+    if len(infrep_lintpattern('(a+)+b')) == 0:
+        raise ValueError('Nested quantifier not found')
+    if len(infrep_lintpattern('(\\w+\\s?)*x')) == 0:
+        raise ValueError('Nested quantifier not found')
+    if len(infrep_lintpattern('(ab)+c*')) != 0:
+        raise ValueError('Nested quantifier found when none exists')
+
+
 def testinfrep_all():
     print('\ntestinfrep_basic')
     testinfrep_basic()
@@ -96,12 +290,39 @@ def testinfrep_all():
     print('testinfrep_inputmethod_re_outputmethod_eval')
     testinfrep_inputmethod_re_outputmethod_eval()
 
+    print('\ntestinfrep_outputmethod_eval_originalterm')
+    testinfrep_outputmethod_eval_originalterm()
+
     print('\ntestinfrep_inputmethod_recompiled')
     testinfrep_inputmethod_recompiled()
 
     print('\ntestinfrep_inputmethod_recompiledfunc_outputmethod_func')
     testinfrep_inputmethod_recompiledfunc_outputmethod_func()
 
+    print('\ntestinfrep_outputmethod_batchfunc')
+    testinfrep_outputmethod_batchfunc()
+
+    print('\ntestinfrep_filechanged')
+    testinfrep_filechanged()
+
+    print('\ntestinfrep_filechangedtwice')
+    testinfrep_filechangedtwice()
+
+    print('\ntestinfrep_filedeleted')
+    testinfrep_filedeleted()
+
+    print('\ntestinfrep_timeout')
+    testinfrep_timeout()
+
+    print('\ntestinfrep_timeout_emptymatch')
+    testinfrep_timeout_emptymatch()
+
+    print('\ntestinfrep_workermatch')
+    testinfrep_workermatch()
+
+    print('\ntestinfrep_lintpattern')
+    testinfrep_lintpattern()
+
 
 # Infrep Argparse Test:{{{1
 def testinfrep_argparse():
@@ -154,6 +375,45 @@ def testinfrep_argparse_fileinput():
         raise ValueError('No match')
         
 
+def testinfrep_argparse_shard():
+    """
+    Split the files between 3 shard processes which each save a plan and then review and apply the merged plans
+    """
+    testinfrep_setup()
+
+    filenames = []
+    for i in range(6):
+        filenames.append(str(__projectdir__ / Path('testinfrep/test_shard' + str(i) + '.txt')))
+        with open(filenames[-1], 'w+') as f:
+            f.write('1\n\\1cat.\n2\n')
+    fileargs = [arg for filename in filenames for arg in ['-f', filename]]
+
+    # scan each shard in a separate process
+    processes = []
+    for i in range(1, 4):
+        processes.append(subprocess.Popen([str(__projectdir__ / Path('run/infrep.py')), '\\1cat.', '\\1dog.', '--shard', str(i) + '/3', '--saveplan', str(__projectdir__ / Path('testinfrep/plan' + str(i) + '.json'))] + fileargs))
+    for process in processes:
+        if process.wait() != 0:
+            raise ValueError('Shard failed')
+
+    # verify nothing was replaced before the plans were applied
+    for filename in filenames:
+        with open(filename) as f:
+            text = f.read()
+        if text != '1\n\\1cat.\n2\n':
+            raise ValueError('Replaced before plans applied')
+
+    # review and apply the merged plans
+    subprocess.check_call([str(__projectdir__ / Path('run/infrep_applyplans.py'))] + [str(__projectdir__ / Path('testinfrep/plan' + str(i) + '.json')) for i in range(1, 4)])
+
+    # verify worked
+    for filename in filenames:
+        with open(filename) as f:
+            text = f.read()
+        if text != '1\n\\1dog.\n2\n':
+            raise ValueError('No match')
+
+
 def testinfrep_argparse_all():
     """
     Run all my test functions for infrep
@@ -170,6 +430,9 @@ def testinfrep_argparse_all():
     print('\ntestinfrep_argparse_fileinput')
     testinfrep_argparse_fileinput()
 
+    print('\ntestinfrep_argparse_shard')
+    testinfrep_argparse_shard()
+
 
 # Pathmv Test:{{{1
 def testpathmv_setup():
@@ -252,10 +515,102 @@ def testpathmv_basic():
         raise ValueError('Match failed')
 
 
+def testpathmv_relpathreferences():
+    """
+    Verify that paths relative to the directory of the file they are in are replaced
+    Also verify that relative paths in a file that is moved are changed to be relative to its new directory
+    """
+    testpathmv_setup()
+    os.mkdir(__projectdir__ / Path('testpathmv/dir2'))
+
+    with open(__projectdir__ / Path('testpathmv/dir2/ref1.txt'), 'w+') as f:
+        f.write('../file1.txt\n')
+    with open(__projectdir__ / Path('testpathmv/ref2.txt'), 'w+') as f:
+        f.write('./file1.txt and/or file1.txt\n')
+    with open(__projectdir__ / Path('testpathmv/file1.txt'), 'a') as f:
+        f.write('dir2/ref1.txt\n')
+    
+    pathmv_main([str(__projectdir__ / Path('testpathmv/file1.txt')), str(__projectdir__ / Path('testpathmv/dir1'))], [str(__projectdir__ / Path('testpathmv/file1.txt')), str(__projectdir__ / Path('testpathmv/dir2/ref1.txt')), str(__projectdir__ / Path('testpathmv/ref2.txt'))])
+
+    with open(__projectdir__ / Path('testpathmv/dir2/ref1.txt')) as f:
+        text = f.read()
+    if text != '../dir1/file1.txt\n':
+        raise ValueError('Match failed')
+    with open(__projectdir__ / Path('testpathmv/ref2.txt')) as f:
+        text = f.read()
+    if text != './dir1/file1.txt and/or file1.txt\n':
+        raise ValueError('Match failed')
+    with open(__projectdir__ / Path('testpathmv/dir1/file1.txt')) as f:
+        text = f.read()
+    if not text.endswith('\n../dir2/ref1.txt\n'):
+        raise ValueError('Match failed')
+
+
+def testpathmv_relpathunchanged():
+    """
+    Verify that a file whose relative paths do not change is not written or saved in a plan
+    """
+    testpathmv_setup()
+
+    with open(__projectdir__ / Path('testpathmv/ref.txt'), 'w+') as f:
+        f.write('see a/b and/or c/d\n')
+    # 2000-01-01
+    os.utime(__projectdir__ / Path('testpathmv/ref.txt'), (946684800, 946684800))
+
+    pathmv_main([str(__projectdir__ / Path('testpathmv/file1.txt')), str(__projectdir__ / Path('testpathmv/dir1'))], [str(__projectdir__ / Path('testpathmv/ref.txt'))], saveplan = str(__projectdir__ / Path('testpathmv/plan.json')))
+    with open(__projectdir__ / Path('testpathmv/plan.json')) as f:
+        plan = json.load(f)
+    if len(plan['files']) != 0:
+        raise ValueError('Saved file with no changes in plan')
+
+    pathmv_main([str(__projectdir__ / Path('testpathmv/file1.txt')), str(__projectdir__ / Path('testpathmv/dir1'))], [str(__projectdir__ / Path('testpathmv/ref.txt'))])
+    if os.stat(__projectdir__ / Path('testpathmv/ref.txt')).st_mtime != 946684800:
+        raise ValueError('Wrote file with no changes')
+
+
+def testpathmv_relpathreferences_home():
+    """
+    Verify that relative paths are replaced correctly when they also match the home directory relative path
+    Sets HOME to testpathmv so dir1/1.txt is the home directory relative path of the moved file as well as part of ../dir1/1.txt
+    """
+    testpathmv_setup()
+    os.mkdir(__projectdir__ / Path('testpathmv/dir2'))
+    os.mkdir(__projectdir__ / Path('testpathmv/dir3'))
+
+    with open(__projectdir__ / Path('testpathmv/dir1/1.txt'), 'w+') as f:
+        f.write('1\n')
+    with open(__projectdir__ / Path('testpathmv/dir3/3.txt'), 'w+') as f:
+        f.write('../dir1/1.txt\n./../dir1/1.txt\n')
+
+    oldhome = os.environ.get('HOME')
+    os.environ['HOME'] = str(__projectdir__ / Path('testpathmv'))
+    try:
+        pathmv_main([str(__projectdir__ / Path('testpathmv/dir1/1.txt')), str(__projectdir__ / Path('testpathmv/dir2/1.txt'))], [str(__projectdir__ / Path('testpathmv/dir3/3.txt'))])
+    finally:
+        if oldhome is None:
+            del os.environ['HOME']
+        else:
+            os.environ['HOME'] = oldhome
+
+    with open(__projectdir__ / Path('testpathmv/dir3/3.txt')) as f:
+        text = f.read()
+    if text != '../dir2/1.txt\n./../dir2/1.txt\n':
+        raise ValueError('Match failed')
+
+
 def testpathmv_all():
     print('\ntestpathmv_basic')
     testpathmv_basic()
 
+    print('\ntestpathmv_relpathreferences')
+    testpathmv_relpathreferences()
+
+    print('\ntestpathmv_relpathreferences_home')
+    testpathmv_relpathreferences_home()
+
+    print('\ntestpathmv_relpathunchanged')
+    testpathmv_relpathunchanged()
+
     print('\ntestpathmv_moveintodir')
     testpathmv_moveintodir()
 
@@ -277,10 +632,156 @@ def testpathmv_argparse_basic():
         raise ValueError('Match failed')
 
 
-def testpathmv_all():
+def testpathmv_argparse_shard():
+    """
+    Save a plan for each of 2 shards and then review and apply the merged plans which also moves the file
+    Applying the plan of only one shard should fail with an error
+    """
+    testpathmv_setup()
+
+    with open(__projectdir__ / Path('testpathmv/file3.txt'), 'w+') as f:
+        f.write(str(__projectdir__ / Path('testpathmv/file1.txt')) + '\n')
+
+    fileargs = ['-f', str(__projectdir__ / Path('testpathmv/file1.txt')), '-f', str(__projectdir__ / Path('testpathmv/file3.txt'))]
+    for i in range(1, 3):
+        subprocess.check_call([str(__projectdir__ / Path('run/pathmv.py')), str(__projectdir__ / Path('testpathmv/file1.txt')), str(__projectdir__ / Path('testpathmv/file2.txt')), '--shard', str(i) + '/2', '--saveplan', str(__projectdir__ / Path('testpathmv/plan' + str(i) + '.json'))] + fileargs)
+
+    # verify a plan on its own is refused since the references in the other shard would not be updated
+    if subprocess.call([str(__projectdir__ / Path('run/infrep_applyplans.py')), str(__projectdir__ / Path('testpathmv/plan1.json'))]) == 0:
+        raise ValueError('Applied the plan of only one shard')
+    if not os.path.isfile(__projectdir__ / Path('testpathmv/file1.txt')):
+        raise ValueError('Moved file when the plan of only one shard was given')
+
+    subprocess.check_call([str(__projectdir__ / Path('run/infrep_applyplans.py')), str(__projectdir__ / Path('testpathmv/plan1.json')), str(__projectdir__ / Path('testpathmv/plan2.json'))])
+
+    for filename in ['testpathmv/file2.txt', 'testpathmv/file3.txt']:
+        with open(__projectdir__ / Path(filename)) as f:
+            text = f.read()
+        if 'file2.txt' not in text:
+            raise ValueError('Match failed')
+
+
+def testpathmv_argparse_all():
     print('testpathmv_argparse_basic')
     testpathmv_argparse_basic()
 
+    print('\ntestpathmv_argparse_shard')
+    testpathmv_argparse_shard()
+
+
+# Start Time Test:{{{1
+# the budgets are the time infrep adds to starting python and doing nothing so they do not include the time python takes to start on this machine
+# they can be set with environment variables on machines where the time varies a lot
+# maximum extra time in seconds to print infrep --help or ask the first question
+starttimebudget = float(os.environ.get('INFREP_STARTTIMEBUDGET', 0.1))
+# maximum extra time in seconds to import all modules
+importtimebudget = float(os.environ.get('INFREP_IMPORTTIMEBUDGET', 0.05))
+# modules that should only be imported when the options that need them are used
+lazymodules = ['bisect', 'colors_basic', 'difflib', 'getch', 'hashlib', 'json', 'multiprocessing', 'pathlib']
+# lines infrep prints when it first waits for an answer
+prompts = ['y/Y/n/N/A/Q: ', 'Proceed (y/n):']
+
+def getstarttimes(command):
+    """
+    Run command with python -X importtime
+    Output is printed so questions can be answered
+    Returns the time it took to finish or to ask the first question and a dictionary of module -> self import time in seconds
+    """
+    # bytecode needs to be written so the time is not the time to compile infrep_func.py
+    env = dict(os.environ)
+    if 'PYTHONDONTWRITEBYTECODE' in env:
+        del env['PYTHONDONTWRITEBYTECODE']
+    # so prompts are read as soon as they are printed
+    env['PYTHONUNBUFFERED'] = '1'
+
+    start = time.time()
+    process = subprocess.Popen([sys.executable, '-X', 'importtime'] + command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, env = env, universal_newlines = True)
+    elapsed = None
+    for line in process.stdout:
+        print(line, end = '')
+        if elapsed is None and line.rstrip('\n') in prompts:
+            elapsed = time.time() - start
+    stderr = process.communicate()[1]
+    if elapsed is None:
+        elapsed = time.time() - start
+    if process.returncode != 0:
+        print(stderr)
+        raise ValueError('Command failed: ' + str(command))
+
+    # lines are of the form 'import time: self | cumulative | module'
+    importtimes = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        selftime, _, module = line[len('import time:'): ].split('|')
+        importtimes[module.strip()] = int(selftime) / 1000000
+
+    return(elapsed, importtimes)
+
+
+def checkstarttimes(elapsed, importtimes, notimported):
+    # measure python doing nothing straight after the command so both are run with the same load on the machine
+    baselineelapsed, baselineimporttimes = getstarttimes(['-c', 'pass'])
+
+    extraelapsed = elapsed - baselineelapsed
+    if extraelapsed > starttimebudget:
+        raise ValueError('Took ' + str(extraelapsed) + ' seconds more than python doing nothing to start which is more than the budget of ' + str(starttimebudget))
+    extraimporttime = sum(importtimes.values()) - sum(baselineimporttimes.values())
+    if extraimporttime > importtimebudget:
+        raise ValueError('Took ' + str(extraimporttime) + ' seconds more than python doing nothing to import modules which is more than the budget of ' + str(importtimebudget))
+    for module in notimported:
+        if module in importtimes:
+            raise ValueError('Imported module that is not needed: ' + module)
+
+
+def teststarttime_help():
+    # run once first so the bytecode is written
+    getstarttimes([str(__projectdir__ / Path('run/infrep.py')), '--help'])
+
+    elapsed, importtimes = getstarttimes([str(__projectdir__ / Path('run/infrep.py')), '--help'])
+    checkstarttimes(elapsed, importtimes, lazymodules)
+
+
+def teststarttime_replace():
+    """
+    A simple replace should only import the modules needed to ask about and make the replacement
+    The time is measured until the first question is asked so it does not include the time to answer
+    Press y to accept the change and then y to proceed
+    """
+    testinfrep_setup()
+
+    elapsed, importtimes = getstarttimes([str(__projectdir__ / Path('run/infrep.py')), '\\1cat.', '\\1dog.', '-f', str(__projectdir__ / Path('testinfrep/test_simple.txt'))])
+    checkstarttimes(elapsed, importtimes, ['bisect', 'hashlib', 'json', 'multiprocessing', 'pathlib'])
+
+    # verify worked
+    with open(__projectdir__ / Path('testinfrep/test_simple.txt')) as f:
+        text = f.read()
+    if text != '1\n\\1dog.\n2\n':
+        raise ValueError('No match')
+
+
+def teststarttime_zipapp():
+    """
+    Build the zipapp and verify it starts within the budget
+    """
+    testinfrep_setup()
+
+    subprocess.check_call([str(__projectdir__ / Path('build_zipapp.sh')), str(__projectdir__ / Path('testinfrep/infrep.pyz'))])
+
+    elapsed, importtimes = getstarttimes([str(__projectdir__ / Path('testinfrep/infrep.pyz')), 'infrep', '--help'])
+    checkstarttimes(elapsed, importtimes, lazymodules)
+
+
+def teststarttime_all():
+    print('\nteststarttime_help')
+    teststarttime_help()
+
+    print('\nteststarttime_replace')
+    teststarttime_replace()
+
+    print('\nteststarttime_zipapp')
+    teststarttime_zipapp()
+
 
 # Run:{{{1
 if __name__ == "__main__":
@@ -288,3 +789,4 @@ if __name__ == "__main__":
     testinfrep_argparse_all()
     testpathmv_all()
     testpathmv_argparse_all()
+    teststarttime_all()